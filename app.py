@@ -1,4 +1,4 @@
-from flask import Flask, redirect, url_for, render_template, request, session, jsonify, flash
+from flask import Flask, redirect, url_for, render_template, request, session, jsonify, flash, make_response
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 import os
@@ -8,9 +8,17 @@ from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 from dotenv import load_dotenv
 import sys
 from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.exceptions import NotFound, BadRequest, TooManyRequests
+from werkzeug.exceptions import NotFound, BadRequest, TooManyRequests, ServiceUnavailable
 import re
+import math
+import itertools
+import time
+import threading
+from contextlib import contextmanager
 from functools import wraps
+from sqlalchemy import select, func
+from sqlalchemy.exc import OperationalError, InterfaceError, TimeoutError as PoolTimeoutError
+import orjson
 
 # Load environment variables from .env file
 load_dotenv()
@@ -112,9 +120,21 @@ def ensure_database_exists():
         app.logger.error(f"Database initialization error: {str(e)}", exc_info=True)
         raise
 
+# Fail fast when Postgres is slow instead of piling requests up on the pool
+DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 5))
+DB_CONNECT_TIMEOUT = int(os.environ.get('DB_CONNECT_TIMEOUT', 5))
+# Applied to public read paths only (see limit_read_statement_timeout); admin writes are unbounded
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 5000))
+
 # Configure SQLAlchemy
 app.config['SQLALCHEMY_DATABASE_URI'] = DB_URL
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'pool_timeout': DB_POOL_TIMEOUT,
+    'connect_args': {
+        'connect_timeout': DB_CONNECT_TIMEOUT
+    }
+}
 db = SQLAlchemy(app)
 
 ###################
@@ -185,6 +205,46 @@ class Setting(db.Model):
             db.session.add(setting)
         db.session.commit()
 
+###################
+# READ-ONLY QUERIES
+###################
+
+# Timestamp format matching Question.to_dict(), applied in Postgres via to_char
+SQL_DATETIME_FORMAT = 'YYYY-MM-DD HH24:MI:SS'
+
+def question_list_statement(moderation_enabled=False):
+    """Build a Core SELECT for question lists, shaped like Question.to_dict()"""
+    stmt = select(
+        Question.id,
+        Question.content,
+        Question.nickname,
+        func.to_char(Question.created_at, SQL_DATETIME_FORMAT).label('created_at'),
+        Question.answer,
+        func.to_char(Question.answered_at, SQL_DATETIME_FORMAT).label('answered_at'),
+        Question.is_approved
+    )
+    if moderation_enabled:
+        stmt = stmt.where(Question.is_approved.is_(True))
+    return stmt.order_by(Question.created_at.desc())
+
+def fetch_question_rows(moderation_enabled=False, limit=None, offset=0):
+    """Fetch questions as plain dicts, bypassing the ORM identity map and change tracking"""
+    stmt = question_list_statement(moderation_enabled)
+    if limit is not None:
+        stmt = stmt.limit(limit).offset(offset)
+    # Reuse the request's session connection; a column-only select hydrates no ORM objects
+    return [dict(row) for row in db.session.execute(stmt).mappings()]
+
+def limit_read_statement_timeout():
+    """Cap statement time for the rest of the current read transaction"""
+    db.session.execute(
+        select(func.set_config('statement_timeout', str(DB_STATEMENT_TIMEOUT_MS), True))
+    )
+
+def orjson_response(data, status=200):
+    """Serialize data with orjson and wrap it in a JSON response"""
+    return app.response_class(orjson.dumps(data), status=status, mimetype='application/json')
+
 ###################
 # DATABASE INIT
 ###################
@@ -228,10 +288,185 @@ def initialize_admin():
             app.logger.error(f"Error initializing admin user: {str(e)}", exc_info=True)
             raise
 
-# Initialize database
-ensure_database_exists()
-setup_database_tables()
-initialize_admin()
+# Initialize database (set SKIP_DB_INIT=true to import the app without a database, e.g. in tests)
+if os.environ.get('SKIP_DB_INIT', 'false').lower() != 'true':
+    ensure_database_exists()
+    setup_database_tables()
+    initialize_admin()
+
+###################
+# OVERLOAD PROTECTION
+###################
+
+# Maximum concurrent units of DB work per worker process
+DB_MAX_INFLIGHT = int(os.environ.get('DB_MAX_INFLIGHT', 8))
+# Seconds a request may wait for a free DB slot before it is shed
+DB_ADMISSION_TIMEOUT = float(os.environ.get('DB_ADMISSION_TIMEOUT', 0.5))
+# Retry-After (seconds) sent with shed requests
+DB_RETRY_AFTER = int(os.environ.get('DB_RETRY_AFTER', 5))
+# Consecutive DB failures that open the circuit, and seconds it stays open
+DB_BREAKER_THRESHOLD = int(os.environ.get('DB_BREAKER_THRESHOLD', 5))
+DB_BREAKER_RESET_TIMEOUT = float(os.environ.get('DB_BREAKER_RESET_TIMEOUT', 30))
+# Number of homepage pages kept as snapshots for degraded mode
+HOMEPAGE_SNAPSHOT_PAGES = int(os.environ.get('HOMEPAGE_SNAPSHOT_PAGES', 5))
+
+# Errors that mean the database is unreachable or overloaded
+DB_FAILURES = (OperationalError, InterfaceError, PoolTimeoutError)
+
+class CircuitBreaker:
+    """Circuit breaker that fails fast after repeated DB failures"""
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, failure_threshold, reset_timeout, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        # Ticket of the request currently running as the half-open trial
+        self.trial_ticket = None
+        self._tickets = itertools.count(1)
+        self._lock = threading.Lock()
+    
+    def is_rejecting(self):
+        """Return True if requests should be shed now, without claiming the half-open trial"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                return True
+            return self.state == self.OPEN and self.clock() - self.opened_at < self.reset_timeout
+    
+    def allow_request(self):
+        """Return a ticket if a DB call may proceed, or None; lets a single trial through once the reset timeout passes"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return next(self._tickets)
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self.trial_ticket = next(self._tickets)
+                app.logger.info("DB circuit breaker half-open, allowing a trial request")
+                return self.trial_ticket
+            return None
+    
+    def record_success(self, ticket=None):
+        """Close the circuit after a successful trial; other requests' successes only reset the failure count"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                if ticket == self.trial_ticket:
+                    app.logger.info("DB circuit breaker closed")
+                    self.state = self.CLOSED
+                    self.failures = 0
+                    self.trial_ticket = None
+            elif self.state == self.CLOSED:
+                self.failures = 0
+    
+    def record_failure(self, ticket=None):
+        """Count a DB failure; while HALF_OPEN only the trial's own failure reopens the circuit"""
+        with self._lock:
+            # Failures from requests already in flight must not push the open window back
+            if self.state == self.OPEN:
+                return
+            if self.state == self.HALF_OPEN and ticket != self.trial_ticket:
+                return
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                app.logger.error(f"DB circuit breaker opened after {self.failures} consecutive failures")
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+                self.trial_ticket = None
+    
+    def release_trial(self, ticket=None):
+        """Give up a trial that ended without a verdict, so the next request can try again"""
+        with self._lock:
+            if self.state == self.HALF_OPEN and ticket == self.trial_ticket:
+                self.state = self.OPEN
+                self.trial_ticket = None
+    
+    def retry_after(self):
+        """Seconds until the circuit may close again, or the default back-off if it is not open"""
+        with self._lock:
+            if self.state != self.OPEN:
+                return DB_RETRY_AFTER
+            remaining = self.reset_timeout - (self.clock() - self.opened_at)
+            return max(1, math.ceil(remaining))
+
+db_breaker = CircuitBreaker(DB_BREAKER_THRESHOLD, DB_BREAKER_RESET_TIMEOUT)
+db_slots = threading.BoundedSemaphore(DB_MAX_INFLIGHT)
+
+# Last good anonymous render of each homepage page: {page: (html, rendered_at)}
+homepage_snapshots = {}
+homepage_snapshots_lock = threading.Lock()
+
+@contextmanager
+def db_admission():
+    """Admit a unit of DB work, raising ServiceUnavailable if it has to be shed"""
+    # Check the breaker first so an open circuit sheds at once, with its own countdown
+    if db_breaker.is_rejecting():
+        app.logger.warning(f"Shedding request to {request.path}: DB circuit breaker is open")
+        raise ServiceUnavailable("Database circuit breaker is open", retry_after=db_breaker.retry_after())
+    if not db_slots.acquire(timeout=DB_ADMISSION_TIMEOUT):
+        app.logger.warning(f"Shedding request to {request.path}: {DB_MAX_INFLIGHT} DB requests already in flight")
+        raise ServiceUnavailable("Too many concurrent database requests", retry_after=DB_RETRY_AFTER)
+    try:
+        # The trial is only claimed once a slot is held, so it never waits on the semaphore
+        ticket = db_breaker.allow_request()
+        if ticket is None:
+            app.logger.warning(f"Shedding request to {request.path}: DB circuit breaker is open")
+            raise ServiceUnavailable("Database circuit breaker is open", retry_after=db_breaker.retry_after())
+        outcome = None
+        try:
+            yield
+            outcome = 'success'
+        except DB_FAILURES:
+            outcome = 'failure'
+            raise
+        finally:
+            if outcome == 'success':
+                db_breaker.record_success(ticket)
+            elif outcome == 'failure':
+                db_breaker.record_failure(ticket)
+            else:
+                # Any other exit (404, template error, SystemExit...) says nothing about DB health
+                db_breaker.release_trial(ticket)
+    finally:
+        db_slots.release()
+
+def service_unavailable_response(retry_after, error_message=None):
+    """Render a 503 page (or JSON for API routes) with a Retry-After header"""
+    if request.path.startswith('/api/'):
+        response = orjson_response({"success": False, "error": "Service temporarily unavailable"}, 503)
+    else:
+        response = make_response(render_template(
+            'error.html',
+            error_title="Service Temporarily Unavailable",
+            error_message=error_message or "We're experiencing heavy load right now. Please try again in a moment."
+        ), 503)
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def store_homepage_snapshot(page, html):
+    """Keep the last good render of a homepage page for degraded mode"""
+    if page > HOMEPAGE_SNAPSHOT_PAGES:
+        return
+    with homepage_snapshots_lock:
+        homepage_snapshots[page] = (html, datetime.utcnow())
+
+def degraded_homepage_response(page, retry_after):
+    """Serve the homepage from its last good snapshot, or a 503 if there is none"""
+    with homepage_snapshots_lock:
+        snapshot = homepage_snapshots.get(page)
+    
+    if snapshot is None:
+        return service_unavailable_response(retry_after)
+    
+    html, rendered_at = snapshot
+    app.logger.warning(f"Serving homepage page {page} from snapshot rendered at {rendered_at}")
+    response = make_response(html)
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Degraded-Mode'] = 'snapshot'
+    return response
 
 ###################
 # DECORATORS
@@ -246,6 +481,14 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def db_guarded(f):
+    """Decorator to run a route under DB admission control and the circuit breaker"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        with db_admission():
+            return f(*args, **kwargs)
+    return decorated_function
+
 ###################
 # PUBLIC ROUTES
 ###################
@@ -253,35 +496,38 @@ def admin_required(f):
 @app.route("/")
 def index():
     """Homepage showing introduction and paginated questions"""
+    # Get page number from query parameters, default to 1
+    page = request.args.get('page', 1, type=int)
+    
+    # Validate page number
+    if page < 1:
+        app.logger.warning(f"Invalid page number requested: {page}")
+        return redirect(url_for('index', page=1))
+    
     try:
-        # Get admin info
-        admin = Admin.query.first()
-        username = admin.display_name if admin else "John"
-        intro = admin.introduction if admin else """Hi there! I'm John, and this is my personal Q&A site. I've created this space to interact with friends, colleagues, and anyone interested in connecting.\n\nFeel free to ask me anything you're curious about - whether it's about my work, hobbies, opinions, or just something you'd like my perspective on. I'll do my best to answer your questions!"""
-        
-        # Get page number from query parameters, default to 1
-        page = request.args.get('page', 1, type=int)
-        
-        # Validate page number
-        if page < 1:
-            app.logger.warning(f"Invalid page number requested: {page}")
-            return redirect(url_for('index', page=1))
+        with db_admission():
+            limit_read_statement_timeout()
             
-        per_page = 10
-        
-        app.logger.debug(f"Fetching questions for page {page} with {per_page} per page")
-        
-        # Check if moderation is enabled
-        moderation_enabled = Setting.get('moderation_enabled', 'false') == 'true'
-        
-        # Get questions with pagination, filtered if moderation is enabled
-        query = Question.query
-        if moderation_enabled:
-            query = query.filter_by(is_approved=True)
+            # Get admin info
+            admin = Admin.query.first()
+            username = admin.display_name if admin else "John"
+            intro = admin.introduction if admin else """Hi there! I'm John, and this is my personal Q&A site. I've created this space to interact with friends, colleagues, and anyone interested in connecting.\n\nFeel free to ask me anything you're curious about - whether it's about my work, hobbies, opinions, or just something you'd like my perspective on. I'll do my best to answer your questions!"""
             
-        questions_pagination = query.order_by(Question.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+            per_page = 10
+            
+            app.logger.debug(f"Fetching questions for page {page} with {per_page} per page")
+            
+            # Check if moderation is enabled
+            moderation_enabled = Setting.get('moderation_enabled', 'false') == 'true'
+            
+            # Get questions with pagination, filtered if moderation is enabled
+            query = Question.query
+            if moderation_enabled:
+                query = query.filter_by(is_approved=True)
+                
+            questions_pagination = query.order_by(Question.created_at.desc()).paginate(
+                page=page, per_page=per_page, error_out=False
+            )
         
         # If page exceeds max pages, redirect to last page
         if page > 1 and not questions_pagination.items:
@@ -294,7 +540,7 @@ def index():
         # Make session variable available to templates
         app.jinja_env.globals['session'] = session
         
-        return render_template(
+        html = render_template(
             'index.html', 
             user=username, 
             introduction=intro,
@@ -302,6 +548,17 @@ def index():
             pagination=questions_pagination,
             admin_name=username
         )
+        
+        # Only anonymous renders are safe to replay to other visitors
+        if not session.get('admin_logged_in'):
+            store_homepage_snapshot(page, html)
+        
+        return html
+    except ServiceUnavailable as e:
+        return degraded_homepage_response(page, e.retry_after)
+    except DB_FAILURES as e:
+        app.logger.error(f"Database unavailable in index route: {str(e)}", exc_info=True)
+        return degraded_homepage_response(page, db_breaker.retry_after())
     except Exception as e:
         app.logger.error(f"Error in index route: {str(e)}", exc_info=True)
         return render_template('500.html'), 500
@@ -333,26 +590,39 @@ def submit_question():
         
         app.logger.info(f"New question from '{nickname}': {question_content[:30]}...")
         
-        # Check if moderation is enabled
-        moderation_enabled = Setting.get('moderation_enabled', 'false') == 'true'
-        is_approved = not moderation_enabled
-            
-        # Create new question
-        new_question = Question(
-            content=question_content, 
-            nickname=nickname,
-            is_approved=is_approved
-        )
-        
         try:
-            # Add to database
-            db.session.add(new_question)
-            db.session.commit()
-            app.logger.info(f"Question saved with ID: {new_question.id}")
-        except Exception as e:
-            db.session.rollback()
-            app.logger.error(f"Error saving question: {str(e)}", exc_info=True)
-            return render_template('500.html'), 500
+            with db_admission():
+                # Check if moderation is enabled
+                moderation_enabled = Setting.get('moderation_enabled', 'false') == 'true'
+                is_approved = not moderation_enabled
+                    
+                # Create new question
+                new_question = Question(
+                    content=question_content, 
+                    nickname=nickname,
+                    is_approved=is_approved
+                )
+                
+                try:
+                    # Add to database
+                    db.session.add(new_question)
+                    db.session.commit()
+                    app.logger.info(f"Question saved with ID: {new_question.id}")
+                except DB_FAILURES:
+                    # Let admission control see the failure; the question is refused below
+                    db.session.rollback()
+                    raise
+                except Exception as e:
+                    db.session.rollback()
+                    app.logger.error(f"Error saving question: {str(e)}", exc_info=True)
+                    return render_template('500.html'), 500
+        except (ServiceUnavailable, *DB_FAILURES) as e:
+            app.logger.warning(f"Refusing question from '{nickname}', database unavailable: {str(e)}")
+            retry_after = e.retry_after if isinstance(e, ServiceUnavailable) else db_breaker.retry_after()
+            return service_unavailable_response(
+                retry_after,
+                "We're experiencing heavy load and couldn't save your question. Please try again in a moment."
+            )
         
         # Redirect back to home page
         return redirect(url_for('index'))
@@ -372,7 +642,8 @@ def admin_login():
         username = request.form.get('username', '').strip()
         password = request.form.get('password', '').strip()
         
-        admin = Admin.query.filter_by(username=username).first()
+        with db_admission():
+            admin = Admin.query.filter_by(username=username).first()
         
         if admin and admin.check_password(password):
             session['admin_logged_in'] = True
@@ -394,6 +665,7 @@ def admin_logout():
 
 @app.route("/admin/dashboard")
 @admin_required
+@db_guarded
 def admin_dashboard():
     """Admin dashboard showing overview and quick actions"""
     admin = Admin.query.get(session['admin_id'])
@@ -424,6 +696,7 @@ def admin_dashboard():
 
 @app.route("/admin/profile", methods=["GET", "POST"])
 @admin_required
+@db_guarded
 def admin_profile():
     """Admin profile editing"""
     admin = Admin.query.get(session['admin_id'])
@@ -446,6 +719,7 @@ def admin_profile():
 
 @app.route("/admin/credentials", methods=["GET", "POST"])
 @admin_required
+@db_guarded
 def admin_credentials():
     """Admin credentials (username/password) editing"""
     admin = Admin.query.get(session['admin_id'])
@@ -484,6 +758,7 @@ def admin_credentials():
 
 @app.route("/admin/questions")
 @admin_required
+@db_guarded
 def admin_questions():
     """Admin questions list with filtering and pagination"""
     admin = Admin.query.get(session['admin_id'])  # Get admin object
@@ -518,6 +793,7 @@ def admin_questions():
 
 @app.route("/admin/question/<int:question_id>", methods=["GET", "POST"])
 @admin_required
+@db_guarded
 def admin_question_edit(question_id):
     """Admin edit/answer individual question"""
     admin = Admin.query.get(session['admin_id'])  # Get admin object
@@ -564,6 +840,7 @@ def admin_question_edit(question_id):
 
 @app.route("/admin/settings", methods=["GET", "POST"])
 @admin_required
+@db_guarded
 def admin_settings():
     """Admin site settings"""
     admin = Admin.query.get(session['admin_id'])  # Get admin object
@@ -584,6 +861,7 @@ def admin_settings():
 
 @app.route("/admin/delete-all-questions", methods=["POST"])
 @admin_required
+@db_guarded
 def admin_delete_all_questions():
     """Delete all questions after confirmation"""
     confirmation = request.form.get('confirmation', '').strip()
@@ -595,6 +873,9 @@ def admin_delete_all_questions():
             db.session.commit()
             app.logger.warning(f"All questions deleted by admin {session['admin_id']}")
             return redirect(url_for('admin_dashboard'))
+        except DB_FAILURES:
+            db.session.rollback()
+            raise
         except Exception as e:
             db.session.rollback()
             app.logger.error(f"Error deleting all questions: {str(e)}", exc_info=True)
@@ -606,8 +887,43 @@ def admin_delete_all_questions():
 # API ROUTES
 ###################
 
+@app.route("/api/questions")
+def api_questions():
+    """Read-only API endpoint listing the questions shown on the homepage"""
+    page = request.args.get('page', 1, type=int)
+    per_page = min(max(request.args.get('per_page', 50, type=int), 1), 500)
+    
+    if page < 1:
+        return orjson_response({"success": False, "error": "Invalid page number"}, 400)
+    
+    try:
+        with db_admission():
+            limit_read_statement_timeout()
+            moderation_enabled = Setting.get('moderation_enabled', 'false') == 'true'
+            questions = fetch_question_rows(
+                moderation_enabled=moderation_enabled,
+                limit=per_page,
+                offset=(page - 1) * per_page
+            )
+    except ServiceUnavailable as e:
+        return service_unavailable_response(e.retry_after)
+    except DB_FAILURES as e:
+        app.logger.error(f"Database unavailable in api_questions route: {str(e)}", exc_info=True)
+        return service_unavailable_response(db_breaker.retry_after())
+    except Exception as e:
+        app.logger.error(f"Error in api_questions route: {str(e)}", exc_info=True)
+        return orjson_response({"success": False, "error": "Internal server error"}, 500)
+    
+    return orjson_response({
+        "success": True,
+        "page": page,
+        "per_page": per_page,
+        "questions": questions
+    })
+
 @app.route("/api/questions/<int:question_id>/approve", methods=["POST"])
 @admin_required
+@db_guarded
 def api_approve_question(question_id):
     """API endpoint to approve a question"""
     question = Question.query.get_or_404(question_id)
@@ -617,6 +933,7 @@ def api_approve_question(question_id):
 
 @app.route("/api/questions/<int:question_id>/delete", methods=["POST"])
 @admin_required
+@db_guarded
 def api_delete_question(question_id):
     """API endpoint to delete a question"""
     question = Question.query.get_or_404(question_id)
@@ -655,6 +972,18 @@ def too_many_requests(e):
                           error_title="Too Many Requests", 
                           error_message="You've made too many requests. Please try again later."), 429
 
+@app.errorhandler(503)
+def service_unavailable(e):
+    app.logger.warning(f"503 error: {request.path} - IP: {request.remote_addr}")
+    return service_unavailable_response(getattr(e, 'retry_after', None) or DB_RETRY_AFTER)
+
+@app.errorhandler(OperationalError)
+@app.errorhandler(InterfaceError)
+@app.errorhandler(PoolTimeoutError)
+def database_unavailable(e):
+    app.logger.error(f"Database unavailable: {str(e)} - {request.path} - IP: {request.remote_addr}", exc_info=True)
+    return service_unavailable_response(db_breaker.retry_after())
+
 @app.errorhandler(500)
 def server_error(e):
     app.logger.error(f"500 error: {str(e)} - IP: {request.remote_addr}", exc_info=True)
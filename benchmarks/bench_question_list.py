@@ -0,0 +1,108 @@
+"""
+Micro-benchmark: ORM Question.to_dict() list serialization vs the Core + orjson fast path.
+
+Seeds a dedicated database (DB_NAME defaults to 'quanda_bench') with questions,
+times both paths over several repetitions and removes the seeded rows afterwards.
+
+Usage:
+    python benchmarks/bench_question_list.py [--rows 10000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Point the app at a throwaway database before it is imported
+os.environ['DB_NAME'] = os.environ.get('BENCH_DB_NAME', 'quanda_bench')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson
+from sqlalchemy import insert, delete
+
+from app import app, db, Question, fetch_question_rows
+
+def seed_questions(count):
+    """Insert count questions, half of them answered, and return their ids"""
+    now = datetime.utcnow()
+    rows = []
+    for i in range(count):
+        created_at = now - timedelta(minutes=i)
+        answered = i % 2 == 0
+        rows.append({
+            'content': f"Benchmark question #{i}: what is your favourite thing about the number {i}?",
+            'nickname': f"bench{i % 100}",
+            'created_at': created_at,
+            'answer': f"Benchmark answer #{i}" if answered else None,
+            'answered_at': created_at + timedelta(seconds=30) if answered else None,
+            'is_approved': True
+        })
+    result = db.session.execute(insert(Question).returning(Question.id), rows)
+    ids = [row.id for row in result]
+    db.session.commit()
+    return ids
+
+def remove_questions(ids):
+    """Delete the seeded questions"""
+    db.session.execute(delete(Question).where(Question.id.in_(ids)))
+    db.session.commit()
+
+def orm_path():
+    """Current path: hydrate ORM objects, call to_dict() on each, encode with json"""
+    questions = Question.query.order_by(Question.created_at.desc()).all()
+    payload = json.dumps([q.to_dict() for q in questions]).encode('utf-8')
+    # Drop the identity map so each repetition starts cold
+    db.session.expunge_all()
+    return payload
+
+def fast_path():
+    """Fast path: plain rows via SQLAlchemy Core, encoded with orjson"""
+    return orjson.dumps(fetch_question_rows())
+
+def time_path(fn, repeat):
+    """Run fn repeat times and return (best, mean) wall time in seconds and the last payload"""
+    timings = []
+    payload = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payload = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), sum(timings) / len(timings), payload
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000, help="number of questions to seed (default: 10000)")
+    parser.add_argument('--repeat', type=int, default=5, help="repetitions per path (default: 5)")
+    args = parser.parse_args()
+
+    with app.app_context():
+        existing = Question.query.count()
+        if existing:
+            print(f"Note: database already holds {existing} questions; they are included in the timings")
+
+        print(f"Seeding {args.rows} questions into '{os.environ['DB_NAME']}'...")
+        ids = seed_questions(args.rows)
+        try:
+            # Warm up connections and caches before timing
+            orm_path()
+            fast_path()
+
+            orm_best, orm_mean, orm_payload = time_path(orm_path, args.repeat)
+            fast_best, fast_mean, fast_payload = time_path(fast_path, args.repeat)
+
+            if json.loads(orm_payload) != json.loads(fast_payload):
+                print("WARNING: payloads differ between the two paths")
+
+            total = existing + args.rows
+            print(f"\n{'path':<22}{'best (ms)':>12}{'mean (ms)':>12}{'rows/s':>14}")
+            print(f"{'ORM + to_dict + json':<22}{orm_best * 1000:>12.1f}{orm_mean * 1000:>12.1f}{total / orm_best:>14,.0f}")
+            print(f"{'Core + orjson':<22}{fast_best * 1000:>12.1f}{fast_mean * 1000:>12.1f}{total / fast_best:>14,.0f}")
+            print(f"\nSpeedup (best): {orm_best / fast_best:.2f}x")
+        finally:
+            remove_questions(ids)
+            print(f"Removed {len(ids)} seeded questions")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Import the app without connecting to Postgres
+os.environ['SKIP_DB_INIT'] = 'true'
+os.environ.setdefault('LOG_LEVEL', 'CRITICAL')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
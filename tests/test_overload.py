@@ -0,0 +1,299 @@
+import threading
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from werkzeug.exceptions import NotFound, ServiceUnavailable
+
+import app as quanda
+from app import CircuitBreaker
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+def db_error():
+    return OperationalError("SELECT 1", {}, Exception("server closed the connection"))
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def breaker(clock, monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=clock)
+    monkeypatch.setattr(quanda, 'db_breaker', breaker)
+    return breaker
+
+@pytest.fixture
+def client(breaker, monkeypatch):
+    monkeypatch.setattr(quanda, 'db_slots', threading.BoundedSemaphore(2))
+    monkeypatch.setattr(quanda, 'DB_ADMISSION_TIMEOUT', 0)
+    monkeypatch.setattr(quanda, 'homepage_snapshots', {})
+    monkeypatch.setitem(quanda.app.config, 'TESTING', True)
+    return quanda.app.test_client()
+
+def run_admitted(fn):
+    """Run fn under db_admission inside a request context"""
+    with quanda.app.test_request_context('/'):
+        with quanda.db_admission():
+            fn()
+
+def fail():
+    raise db_error()
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(OperationalError):
+            run_admitted(fail)
+
+###################
+# CIRCUIT BREAKER
+###################
+
+def test_breaker_opens_after_threshold(breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow_request() is None
+
+def test_success_in_closed_resets_failures(breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_success_while_open_is_ignored(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow_request() is None
+
+def test_half_open_trial_success_closes(breaker, clock):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    clock.advance(29)
+    assert breaker.allow_request() is None
+    clock.advance(1)
+    trial = breaker.allow_request()
+    assert trial is not None
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Only a single trial is let through
+    assert breaker.allow_request() is None
+    breaker.record_success(trial)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request() is not None
+
+def test_half_open_trial_failure_reopens(breaker, clock):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    clock.advance(30)
+    trial = breaker.allow_request()
+    breaker.record_failure(trial)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.retry_after() == 30
+
+def test_half_open_ignores_outcomes_of_other_requests(breaker, clock):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    clock.advance(30)
+    trial = breaker.allow_request()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.release_trial()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.record_success(trial)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_failures_while_open_do_not_extend_open_window(breaker, clock):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    clock.advance(10)
+    # Requests that were in flight when the breaker tripped fail afterwards
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.retry_after() == 20
+    clock.advance(20)
+    assert breaker.allow_request() is not None
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+def test_retry_after_counts_down(breaker, clock):
+    assert breaker.retry_after() == quanda.DB_RETRY_AFTER
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    clock.advance(12.5)
+    assert breaker.retry_after() == 18
+
+###################
+# ADMISSION CONTROL
+###################
+
+def test_admission_records_db_failures(breaker):
+    trip(breaker)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(ServiceUnavailable) as excinfo:
+        run_admitted(lambda: None)
+    assert excinfo.value.retry_after == 30
+
+def test_straggling_success_does_not_close_open_breaker(breaker):
+    # A slow request admitted before the trip finishes after it
+    with quanda.app.test_request_context('/'):
+        with quanda.db_admission():
+            trip(breaker)
+    assert breaker.state == CircuitBreaker.OPEN
+
+def test_straggling_success_does_not_close_half_open_breaker(breaker, clock):
+    # A slow request admitted while CLOSED outlives the reset timeout and the trial is still running
+    with quanda.app.test_request_context('/'):
+        with quanda.db_admission():
+            trip(breaker)
+            clock.advance(30)
+            trial = breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.record_success(trial)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_non_db_error_during_trial_releases_it(breaker, clock):
+    trip(breaker)
+    clock.advance(30)
+
+    def not_found():
+        raise NotFound()
+
+    with pytest.raises(NotFound):
+        run_admitted(not_found)
+    assert breaker.state == CircuitBreaker.OPEN
+    # The next request gets a fresh trial rather than a stuck HALF_OPEN
+    run_admitted(lambda: None)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_base_exception_during_trial_releases_it(breaker, clock):
+    trip(breaker)
+    clock.advance(30)
+
+    def interrupt():
+        raise KeyboardInterrupt()
+
+    with pytest.raises(KeyboardInterrupt):
+        run_admitted(interrupt)
+    assert breaker.allow_request() is not None
+
+def test_admission_sheds_when_slots_are_full(client, monkeypatch):
+    monkeypatch.setattr(quanda, 'db_slots', threading.BoundedSemaphore(1))
+    quanda.db_slots.acquire()
+    try:
+        with pytest.raises(ServiceUnavailable) as excinfo:
+            run_admitted(lambda: None)
+    finally:
+        quanda.db_slots.release()
+    assert excinfo.value.retry_after == quanda.DB_RETRY_AFTER
+
+def test_open_breaker_sheds_before_waiting_for_a_slot(client, breaker, monkeypatch):
+    class HungSlots:
+        def acquire(self, timeout=None):
+            raise AssertionError("waited for a DB slot while the breaker was open")
+
+    trip(breaker)
+    breaker.clock.advance(10)
+    monkeypatch.setattr(quanda, 'db_slots', HungSlots())
+    with pytest.raises(ServiceUnavailable) as excinfo:
+        run_admitted(lambda: None)
+    assert excinfo.value.retry_after == 20
+
+def test_trial_is_not_claimed_when_no_slot_is_free(client, breaker, monkeypatch):
+    trip(breaker)
+    breaker.clock.advance(30)
+    slots = threading.BoundedSemaphore(1)
+    slots.acquire()
+    monkeypatch.setattr(quanda, 'db_slots', slots)
+    with pytest.raises(ServiceUnavailable):
+        run_admitted(lambda: None)
+    assert breaker.state == CircuitBreaker.OPEN
+    slots.release()
+    # Once a slot frees up the next request becomes the trial
+    run_admitted(lambda: None)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_admission_releases_slot_on_failure(client):
+    with pytest.raises(OperationalError):
+        run_admitted(fail)
+    # Both slots are free again
+    assert quanda.db_slots.acquire(blocking=False)
+    assert quanda.db_slots.acquire(blocking=False)
+
+###################
+# 503 RESPONSES
+###################
+
+def test_api_shed_returns_json_503(client, breaker):
+    trip(breaker)
+    response = client.get('/api/questions')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '30'
+    assert response.is_json
+    assert response.get_json() == {"success": False, "error": "Service temporarily unavailable"}
+
+def test_submit_question_refused_with_html_503(client, breaker):
+    trip(breaker)
+    response = client.post('/submit-question', data={'question': 'Still there?', 'nickname': 'anon'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '30'
+    assert response.mimetype == 'text/html'
+    assert b"save your question" in response.data
+
+def test_guarded_admin_route_returns_html_503(client, breaker):
+    trip(breaker)
+    with client.session_transaction() as sess:
+        sess['admin_logged_in'] = True
+        sess['admin_id'] = 1
+    response = client.get('/admin/dashboard')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '30'
+    assert b"Service Temporarily Unavailable" in response.data
+
+def test_login_form_served_while_breaker_open(client, breaker):
+    trip(breaker)
+    response = client.get('/admin/login')
+    assert response.status_code == 200
+
+###################
+# DEGRADED HOMEPAGE
+###################
+
+def test_homepage_without_snapshot_returns_503(client, breaker):
+    trip(breaker)
+    response = client.get('/')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '30'
+    assert 'X-Degraded-Mode' not in response.headers
+
+def test_homepage_served_from_snapshot(client, breaker):
+    with quanda.app.test_request_context('/'):
+        quanda.store_homepage_snapshot(1, '<html>last good page</html>')
+    trip(breaker)
+    response = client.get('/')
+    assert response.status_code == 200
+    assert response.data == b'<html>last good page</html>'
+    assert response.headers['X-Degraded-Mode'] == 'snapshot'
+    assert response.headers['Cache-Control'] == 'no-store'
+
+def test_snapshot_is_per_page(client, breaker):
+    with quanda.app.test_request_context('/'):
+        quanda.store_homepage_snapshot(1, '<html>page one</html>')
+    trip(breaker)
+    response = client.get('/?page=2')
+    assert response.status_code == 503
+
+def test_snapshots_beyond_limit_are_not_stored(client):
+    with quanda.app.test_request_context('/'):
+        quanda.store_homepage_snapshot(quanda.HOMEPAGE_SNAPSHOT_PAGES + 1, '<html></html>')
+    assert quanda.homepage_snapshots == {}
@@ -0,0 +1,155 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+import app as quanda
+from app import Question
+
+# to_char tokens and their strftime equivalents
+TO_CHAR_TO_STRFTIME = [('YYYY', '%Y'), ('HH24', '%H'), ('MM', '%m'), ('DD', '%d'), ('MI', '%M'), ('SS', '%S')]
+
+def compile_pg(stmt):
+    return str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}))
+
+def sample_question():
+    return Question(
+        id=7,
+        content="What's your favourite editor?",
+        nickname='anon',
+        created_at=datetime(2025, 3, 9, 8, 5, 1, 999999),
+        answer='vim',
+        answered_at=datetime(2025, 3, 10, 23, 59, 59),
+        is_approved=True
+    )
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def mappings(self):
+        return self.rows
+
+@pytest.fixture
+def captured_statements(monkeypatch):
+    statements = []
+
+    def execute(stmt):
+        statements.append(stmt)
+        return FakeResult([])
+
+    monkeypatch.setattr(quanda.db.session, 'execute', execute)
+    return statements
+
+@pytest.fixture
+def rows():
+    """Rows returned by the mocked fetch, and the arguments it was called with"""
+    return {'rows': [], 'calls': []}
+
+@pytest.fixture
+def client(rows, monkeypatch):
+    def fetch_question_rows(**kwargs):
+        rows['calls'].append(kwargs)
+        return rows['rows']
+
+    monkeypatch.setattr(quanda, 'fetch_question_rows', fetch_question_rows)
+    monkeypatch.setattr(quanda, 'limit_read_statement_timeout', lambda: None)
+    monkeypatch.setattr(quanda.Setting, 'get', classmethod(lambda cls, key, default=None: default))
+    monkeypatch.setitem(quanda.app.config, 'TESTING', True)
+    return quanda.app.test_client()
+
+###################
+# STATEMENT
+###################
+
+def test_statement_selects_to_dict_columns():
+    stmt = quanda.question_list_statement()
+    assert [column.name for column in stmt.selected_columns] == list(sample_question().to_dict())
+
+def test_statement_formats_timestamps_in_postgres():
+    sql = compile_pg(quanda.question_list_statement())
+    assert "to_char(question.created_at, 'YYYY-MM-DD HH24:MI:SS') AS created_at" in sql
+    assert "to_char(question.answered_at, 'YYYY-MM-DD HH24:MI:SS') AS answered_at" in sql
+
+def test_sql_datetime_format_matches_to_dict():
+    strftime_format = quanda.SQL_DATETIME_FORMAT
+    for token, directive in TO_CHAR_TO_STRFTIME:
+        strftime_format = strftime_format.replace(token, directive)
+    question = sample_question()
+    data = question.to_dict()
+    assert question.created_at.strftime(strftime_format) == data['created_at']
+    assert question.answered_at.strftime(strftime_format) == data['answered_at']
+
+def test_statement_without_moderation_has_no_filter():
+    sql = compile_pg(quanda.question_list_statement(moderation_enabled=False))
+    assert 'WHERE' not in sql
+    assert sql.endswith('ORDER BY question.created_at DESC')
+
+def test_statement_with_moderation_filters_approved():
+    sql = compile_pg(quanda.question_list_statement(moderation_enabled=True))
+    assert 'WHERE question.is_approved IS true ORDER BY question.created_at DESC' in sql
+
+def test_fetch_applies_limit_and_offset(captured_statements):
+    quanda.fetch_question_rows(limit=10, offset=20)
+    sql = compile_pg(captured_statements[0])
+    assert sql.endswith('ORDER BY question.created_at DESC \n LIMIT 10 OFFSET 20')
+
+def test_fetch_without_limit_returns_everything(captured_statements):
+    assert quanda.fetch_question_rows() == []
+    sql = compile_pg(captured_statements[0])
+    assert 'LIMIT' not in sql and 'OFFSET' not in sql
+
+def test_fetch_returns_plain_dicts(monkeypatch):
+    row = sample_question().to_dict()
+    monkeypatch.setattr(quanda.db.session, 'execute', lambda stmt: FakeResult([row]))
+    result = quanda.fetch_question_rows()
+    assert result == [row]
+    assert type(result[0]) is dict
+
+###################
+# API
+###################
+
+def test_api_returns_to_dict_shape(client, rows):
+    rows['rows'] = [sample_question().to_dict()]
+    response = client.get('/api/questions')
+    assert response.status_code == 200
+    assert response.is_json
+    assert response.get_json() == {
+        "success": True,
+        "page": 1,
+        "per_page": 50,
+        "questions": [sample_question().to_dict()]
+    }
+    assert rows['calls'] == [{'moderation_enabled': False, 'limit': 50, 'offset': 0}]
+
+def test_api_pages_with_offset(client, rows):
+    client.get('/api/questions?page=3&per_page=20')
+    assert rows['calls'] == [{'moderation_enabled': False, 'limit': 20, 'offset': 40}]
+
+@pytest.mark.parametrize('requested, expected', [(0, 1), (-5, 1), (1, 1), (500, 500), (501, 500), (10000, 500)])
+def test_api_clamps_per_page(client, rows, requested, expected):
+    response = client.get(f'/api/questions?per_page={requested}')
+    assert response.get_json()['per_page'] == expected
+    assert rows['calls'][0]['limit'] == expected
+
+@pytest.mark.parametrize('page', [0, -1])
+def test_api_rejects_invalid_page(client, rows, page):
+    response = client.get(f'/api/questions?page={page}')
+    assert response.status_code == 400
+    assert response.get_json() == {"success": False, "error": "Invalid page number"}
+    assert rows['calls'] == []
+
+def test_api_respects_moderation(client, rows, monkeypatch):
+    monkeypatch.setattr(quanda.Setting, 'get', classmethod(lambda cls, key, default=None: 'true'))
+    client.get('/api/questions')
+    assert rows['calls'][0]['moderation_enabled'] is True
+
+def test_api_error_returns_json_500(client, monkeypatch):
+    def broken(**kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(quanda, 'fetch_question_rows', broken)
+    response = client.get('/api/questions')
+    assert response.status_code == 500
+    assert response.get_json() == {"success": False, "error": "Internal server error"}